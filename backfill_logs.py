@@ -0,0 +1,284 @@
+# backfill_logs.py
+"""Import historical connections from honeypot.log (and its rotated
+honeypot.log.1..5 siblings) into the ``connections`` table.
+
+Usage:
+    python backfill_logs.py [--workers N] [--chunk-mb MB] [--reset] [LOG ...]
+
+How it works:
+1. Every file is split into newline-aligned byte chunks which a process
+   pool parses in parallel with a fixed-format (slice based) parser.
+   Only a small window of chunks is in flight at a time.
+2. Each chunk is deduplicated against ``connections`` by (ip, port) with
+   ts within DEDUP_WINDOW, using a query limited to that chunk's time range.
+   The honeypot stores its own clock reading, which can fall on the other
+   side of a second boundary from the log's timestamp.
+3. New rows are bulk inserted and the byte offset reached in each file is
+   recorded in **backfill_state.json**, keyed by the file's first line, so
+   an interrupted run resumes where it stopped and a growing honeypot.log
+   only has its new lines scanned. A trailing partial line is left for the
+   next run.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+# ── Paths / settings ─────────────────────────────────────────────────────
+BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE_PATH   = os.path.join(BASE_DIR, "honeypot.log")
+STATE_FILE_PATH = os.path.join(BASE_DIR, "backfill_state.json")
+CHUNK_MB        = 8          # megabytes handed to one worker per task
+BATCH_SIZE      = 5000       # rows per bulk INSERT
+TS_INDEX        = "ix_connections_ts_backfill"
+DEDUP_WINDOW    = timedelta(seconds=1)
+
+# "2025-05-16 03:13:26,366 - INFO - Connection from 127.0.0.1:55092"
+#  ^ts (23 chars)          ^marker (26 chars)          ^ip:port
+MARKER     = " - INFO - Connection from "
+MARKER_AT  = 23
+PAYLOAD_AT = MARKER_AT + len(MARKER)
+
+# ── Parsing (runs inside worker processes) ───────────────────────────────
+
+def parse_line(line: str):
+    """Return (ip, port, ts) for a connection line, or None for anything else."""
+    if line[MARKER_AT:PAYLOAD_AT] != MARKER:
+        return None
+    try:
+        ts = datetime(
+            int(line[0:4]), int(line[5:7]), int(line[8:10]),
+            int(line[11:13]), int(line[14:16]), int(line[17:19]),
+            int(line[20:23]) * 1000,
+        )
+        ip, _, port = line[PAYLOAD_AT:].rstrip().rpartition(":")
+        return (ip, int(port), ts) if ip else None
+    except ValueError:
+        return None
+
+
+def parse_chunk(task: tuple[str, int, int]) -> tuple[int, int, int, list]:
+    """Parse bytes [start, end) of a log file. Returns (start, end, lines, rows)."""
+    path, start, end = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    rows = [row for row in map(parse_line, lines) if row is not None]
+    return start, end, len(lines), rows
+
+# ── Chunking / resume state ──────────────────────────────────────────────
+
+def default_logs() -> list[str]:
+    """honeypot.log plus rotated siblings (honeypot.log.N), oldest first."""
+    rotated = [
+        p for p in glob.glob(LOG_FILE_PATH + ".*")
+        if re.fullmatch(r"\d+", p.rsplit(".", 1)[1])
+    ]
+    rotated.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    return [p for p in rotated + [LOG_FILE_PATH] if os.path.isfile(p)]
+
+
+def fingerprint(path: str) -> str | None:
+    """Identify a log by its first line, which survives rotation renames and
+    doesn't change as the file grows. Returns None until a full line exists."""
+    with open(path, "rb") as f:
+        first = f.readline()
+    if not first.endswith(b"\n"):
+        return None
+    return hashlib.sha1(first).hexdigest()
+
+
+def complete_size(path: str) -> int:
+    """Byte length of *path* up to and including its last newline."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            idx = f.read(step).rfind(b"\n")
+            if idx != -1:
+                return pos - step + idx + 1
+            pos -= step
+    return 0
+
+
+def chunk_bounds(path: str, chunk_size: int, start: int = 0) -> list[tuple[int, int]]:
+    """Split the complete lines of *path* after *start* into byte ranges that
+    each end on a line boundary."""
+    limit = complete_size(path)
+    bounds = []
+    with open(path, "rb") as f:
+        while start < limit:
+            f.seek(min(start + chunk_size, limit))
+            f.readline()
+            end = min(f.tell(), limit)
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def load_state(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(path: str, state: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+# ── Main ─────────────────────────────────────────────────────────────────
+
+def backfill(
+    paths: list[str] | None = None,
+    workers: int | None = None,
+    chunk_mb: float = CHUNK_MB,
+    state_path: str = STATE_FILE_PATH,
+    reset: bool = False,
+) -> dict[str, float]:
+    """Import *paths* into ``connections`` and return throughput statistics."""
+    # Imported here so worker processes don't initialise the database
+    from sqlalchemy import inspect, select, text
+    from db_utils import engine, connections, ip_to_int
+
+    paths = paths or default_logs()
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(int(chunk_mb * 1024 * 1024), 1)
+    state = {} if reset else load_state(state_path)
+
+    tasks, keys = [], {}
+    for path in paths:
+        key = fingerprint(path)
+        if key is None:
+            continue
+        keys[path] = key
+        offset = state.get(key)
+        offset = offset if isinstance(offset, int) else 0
+        tasks += [(path, s, e) for s, e in chunk_bounds(path, chunk_size, offset)]
+
+    def existing_times(rows) -> dict:
+        """Sorted stored ts per (ip, port) around the time span of *rows*."""
+        lo = min(r[2] for r in rows) - DEDUP_WINDOW
+        hi = max(r[2] for r in rows) + DEDUP_WINDOW
+        stmt = select(connections.c.ip, connections.c.port, connections.c.ts).where(
+            connections.c.ts >= lo, connections.c.ts <= hi
+        )
+        times: dict[tuple[str, int], list[datetime]] = {}
+        with engine.connect() as conn:
+            for ip, port, ts in conn.execute(stmt):
+                times.setdefault((ip, port), []).append(ts)
+        for stamps in times.values():
+            stamps.sort()
+        return times
+
+    def is_duplicate(times: dict, ip: str, port: int, ts: datetime) -> bool:
+        stamps = times.get((ip, port))
+        if not stamps:
+            return False
+        i = bisect_left(stamps, ts - DEDUP_WINDOW)
+        return i < len(stamps) and stamps[i] <= ts + DEDUP_WINDOW
+
+    ip_nums: dict[str, int | None] = {}
+    stats = {"chunks": len(tasks), "bytes": 0, "lines": 0, "inserted": 0, "duplicates": 0}
+    started = time.perf_counter()
+    # Temporary ts index for the per-chunk range lookups. It is not part of
+    # the schema: with it present SQLite walks it for the dashboard's
+    # ORDER BY ts instead of range-scanning ix_connections_ip_num.
+    created_index = TS_INDEX not in {i["name"] for i in inspect(engine).get_indexes("connections")}
+    if created_index:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX {TS_INDEX} ON connections (ts)"))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded window in flight and consume it in submission order,
+            # so parsed rows never pile up and offsets advance contiguously
+            window = 2 * workers
+            todo = iter(tasks)
+            pending = deque()
+
+            def submit_next() -> None:
+                task = next(todo, None)
+                if task is not None:
+                    pending.append((task[0], pool.submit(parse_chunk, task)))
+
+            for _ in range(window):
+                submit_next()
+
+            while pending:
+                path, future = pending.popleft()
+                start, end, n_lines, rows = future.result()
+                submit_next()
+
+                fresh = []
+                if rows:
+                    times = existing_times(rows)
+                    for ip, port, ts in rows:
+                        if is_duplicate(times, ip, port, ts):
+                            stats["duplicates"] += 1
+                            continue
+                        insort(times.setdefault((ip, port), []), ts)
+                        if ip not in ip_nums:
+                            ip_nums[ip] = ip_to_int(ip)
+                        fresh.append({"ip": ip, "ip_num": ip_nums[ip], "port": port, "ts": ts})
+                    with engine.begin() as conn:
+                        for i in range(0, len(fresh), BATCH_SIZE):
+                            conn.execute(connections.insert(), fresh[i:i + BATCH_SIZE])
+
+                state[keys[path]] = end
+                save_state(state_path, state)
+                stats["bytes"] += end - start
+                stats["lines"] += n_lines
+                stats["inserted"] += len(fresh)
+    finally:
+        if created_index:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {TS_INDEX}"))
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = elapsed
+    stats["lines_per_sec"] = stats["lines"] / elapsed if elapsed else 0.0
+    stats["mb_per_sec"] = stats["bytes"] / 1024 / 1024 / elapsed if elapsed else 0.0
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill honeypot.log archives into the database.")
+    parser.add_argument("logs", nargs="*", help="log files (default: honeypot.log and rotations)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_MB, help="chunk size per task in MB")
+    parser.add_argument("--state", default=STATE_FILE_PATH, help="resume state file")
+    parser.add_argument("--reset", action="store_true", help="ignore saved progress and rescan everything")
+    args = parser.parse_args(argv)
+
+    paths = args.logs or default_logs()
+    if not paths:
+        sys.exit("No log files found")
+    for path in paths:
+        if not os.path.isfile(path) or not os.access(path, os.R_OK):
+            sys.exit(f"Log file not found or not readable: {path}")
+    stats = backfill(paths, args.workers, args.chunk_mb, args.state, args.reset)
+    print(
+        f"Processed {stats['chunks']} chunks, {stats['lines']} lines "
+        f"({stats['bytes'] / 1024 / 1024:.1f} MB) in {stats['seconds']:.2f}s – "
+        f"{stats['lines_per_sec']:,.0f} lines/s, {stats['mb_per_sec']:.1f} MB/s. "
+        f"Inserted {stats['inserted']}, skipped {stats['duplicates']} duplicates."
+    )
+
+
+if __name__ == "__main__":
+    main()
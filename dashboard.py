@@ -22,7 +22,8 @@ from flask_login import (
 )
 from sqlalchemy import text, select, func
 from sqlalchemy import inspect as sa_inspect
-from db_utils import engine, connections
+from db_utils import engine, connections, cidr_range, int_to_ip
+from sql_profiler import init_profiler
 
 bp = Blueprint("dashboard", __name__, template_folder="templates")
 login_manager = LoginManager()
@@ -96,6 +97,7 @@ def hits():
 @login_required
 def dashboard():
     ip = request.args.get("ip")
+    cidr = request.args.get("cidr")
     start = request.args.get("start")
     end = request.args.get("end")
     alert_only = request.args.get("alert_only")
@@ -105,6 +107,16 @@ def dashboard():
     if ip:
         filters.append("c.ip = :ip")
         params["ip"] = ip
+    order = "c.ts DESC"
+    if cidr:
+        try:
+            params["lo"], params["hi"] = cidr_range(cidr)
+            filters.append("c.ip_num BETWEEN :lo AND :hi")
+            # Sort on an expression so SQLite range-scans ix_connections_ip_num
+            # rather than walking any index on ts in order
+            order = "COALESCE(c.ts, c.ts) DESC"
+        except ValueError:
+            flash(f"Invalid CIDR range: {cidr}", "error")
     if start:
         filters.append("c.ts >= :start")
         params["start"] = start
@@ -120,7 +132,7 @@ def dashboard():
                FROM connections c
                LEFT JOIN alerts a ON c.ip = a.ip
                %s
-               ORDER BY c.ts DESC""" % where
+               ORDER BY %s""" % (where, order)
     )
     with engine.connect() as conn:
         rows = conn.execute(query, params).fetchall()
@@ -137,12 +149,36 @@ def forecast():
 @login_required
 def api_stats():
     ip = request.args.get("ip")
+    cidr = request.args.get("cidr")
+    prefix = request.args.get("prefix")
     # Support both legacy (start/end) and new (start_date/end_date) params
     start = request.args.get("start_date") or request.args.get("start")
     end = request.args.get("end_date") or request.args.get("end")
-    stmt = select(connections.c.ip, func.count().label("hits")).group_by(connections.c.ip)
+    if prefix is not None:
+        try:
+            prefix = int(prefix)
+        except ValueError:
+            prefix = -1
+        if not 0 <= prefix <= 32:
+            return jsonify({"error": "prefix must be an integer from 0 to 32"}), 400
+        # Aggregate by subnet: addresses sharing the top `prefix` bits
+        shift = 32 - prefix
+        subnet = connections.c.ip_num.op(">>")(shift).label("subnet")
+        stmt = (
+            select(subnet, func.count().label("hits"))
+            .where(connections.c.ip_num.isnot(None))
+            .group_by(subnet)
+        )
+    else:
+        stmt = select(connections.c.ip, func.count().label("hits")).group_by(connections.c.ip)
     if ip:
         stmt = stmt.where(connections.c.ip == ip)
+    if cidr:
+        try:
+            lo, hi = cidr_range(cidr)
+        except ValueError:
+            return jsonify({"error": f"Invalid CIDR range: {cidr}"}), 400
+        stmt = stmt.where(connections.c.ip_num.between(lo, hi))
     if start:
         try:
             stmt = stmt.where(connections.c.ts >= datetime.fromisoformat(start))
@@ -155,6 +191,13 @@ def api_stats():
             pass
     with engine.connect() as conn:
         rows = conn.execute(stmt).all()
+    if prefix is not None:
+        return jsonify(
+            [
+                {"subnet": f"{int_to_ip(r.subnet << shift)}/{prefix}", "hits": r.hits}
+                for r in rows
+            ]
+        )
     return jsonify([{"ip": r.ip, "hits": r.hits} for r in rows])
 
 
@@ -193,6 +236,7 @@ def create_app() -> Flask:
     app = Flask(__name__)
     app.secret_key = os.getenv("SECRET_KEY", "devkey")
     login_manager.init_app(app)
+    init_profiler(app, engine)
     app.register_blueprint(bp)
     return app
 
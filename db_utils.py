@@ -1,7 +1,8 @@
+import ipaddress
 import os
 import random
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 import bcrypt
 from sqlalchemy import (
@@ -10,9 +11,11 @@ from sqlalchemy import (
     Table,
     Column,
     Integer,
+    BigInteger,
     String,
     DateTime,
     ForeignKey,
+    inspect,
     text,
 )
 from sqlalchemy.engine import Engine
@@ -36,6 +39,7 @@ connections = Table(
     metadata,
     Column("id", Integer, primary_key=True),
     Column("ip", String, nullable=False),
+    Column("ip_num", BigInteger, nullable=True, index=True),
     Column("port", Integer, nullable=False),
     Column("ts", DateTime, nullable=False, default=datetime.utcnow),
     Column("user_id", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
@@ -46,11 +50,91 @@ alerts = Table(
     metadata,
     Column("id", Integer, primary_key=True),
     Column("ip", String, nullable=False),
+    Column("ip_num", BigInteger, nullable=True, index=True),
     Column("message", String, nullable=False),
     Column("ts", DateTime, nullable=False, default=datetime.utcnow),
 )
 
 
+def ip_to_int(ip: str) -> Optional[int]:
+    """Return the numeric form of an IPv4 address, or None if it isn't one."""
+    try:
+        addr = ipaddress.ip_address(ip.strip())
+    except (AttributeError, ValueError):
+        return None
+    return int(addr) if addr.version == 4 else None
+
+
+def int_to_ip(value: int) -> str:
+    return str(ipaddress.IPv4Address(value))
+
+
+def cidr_range(cidr: str) -> Tuple[int, int]:
+    """Return the inclusive (first, last) numeric bounds of an IPv4 CIDR.
+
+    A bare address is treated as a /32. Raises ValueError if *cidr* is not
+    a valid IPv4 network.
+    """
+    net = ipaddress.IPv4Network(cidr.strip(), strict=False)
+    return int(net.network_address), int(net.broadcast_address)
+
+
+def migrate_ip_num(verbose: bool = False) -> None:
+    """Add the numeric ``ip_num`` column and its index on older databases.
+
+    Existing rows are left NULL; fill them with :func:`backfill_ip_num`.
+    """
+    for table in (connections, alerts):
+        existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+        with engine.begin() as conn:
+            if "ip_num" not in existing:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN ip_num BIGINT"))
+                if verbose:
+                    print(f"Added {table.name}.ip_num")
+            conn.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table.name}_ip_num "
+                    f"ON {table.name} (ip_num)"
+                )
+            )
+
+
+def backfill_ip_num(verbose: bool = False, batch_size: int = 10_000) -> None:
+    """Fill ``ip_num`` for rows written before the column existed.
+
+    Walks each table by primary key in batches and updates rows by ``id``,
+    so the cost is linear in the number of rows. Rows whose ``ip`` is not
+    an IPv4 address keep ``ip_num`` NULL.
+    """
+    for table in (connections, alerts):
+        last_id, filled = 0, 0
+        while True:
+            with engine.begin() as conn:
+                batch = conn.execute(
+                    text(
+                        f"SELECT id, ip FROM {table.name} "
+                        "WHERE ip_num IS NULL AND id > :last ORDER BY id LIMIT :n"
+                    ),
+                    {"last": last_id, "n": batch_size},
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                updates = [
+                    {"id": row.id, "n": num}
+                    for row, num in ((row, ip_to_int(row.ip)) for row in batch)
+                    if num is not None
+                ]
+                if updates:
+                    conn.execute(
+                        text(f"UPDATE {table.name} SET ip_num = :n WHERE id = :id"),
+                        updates,
+                    )
+                filled += len(updates)
+        if verbose:
+            print(f"Backfilled ip_num for {filled} rows in {table.name}")
+
+
 def init_db(verbose: bool = False) -> None:
     """Ensure database exists and has a default admin user.
 
@@ -66,6 +150,7 @@ def init_db(verbose: bool = False) -> None:
         pass
 
     metadata.create_all(engine)
+    migrate_ip_num(verbose=verbose)
 
     default_username = os.getenv("ADMIN_USER", "admin")
     default_password = os.getenv("ADMIN_PASS", "admin")
@@ -100,13 +185,17 @@ def init_db(verbose: bool = False) -> None:
 def insert_connection(ip: str, port: int, ts: datetime, user_id: Optional[int] = None) -> None:
     with engine.begin() as conn:
         conn.execute(
-            connections.insert().values(ip=ip, port=port, ts=ts, user_id=user_id)
+            connections.insert().values(
+                ip=ip, ip_num=ip_to_int(ip), port=port, ts=ts, user_id=user_id
+            )
         )
 
 
 def insert_alert(ip: str, message: str, ts: datetime) -> None:
     with engine.begin() as conn:
-        conn.execute(alerts.insert().values(ip=ip, message=message, ts=ts))
+        conn.execute(
+            alerts.insert().values(ip=ip, ip_num=ip_to_int(ip), message=message, ts=ts)
+        )
 
 
 __all__ = [
@@ -118,6 +207,11 @@ __all__ = [
     "alerts",
     "metadata",
     "init_db",
+    "migrate_ip_num",
+    "backfill_ip_num",
+    "ip_to_int",
+    "int_to_ip",
+    "cidr_range",
 ]
 # --- Demo/seed helpers -----------------------------------------------------
 
@@ -220,12 +314,12 @@ def seed_demo_data_2025(verbose: bool = False) -> None:
             port = rng.choice(ports)
             ts = day + timedelta(seconds=rng.randint(0, 86399))
             uid = rng.choice(user_ids) if rng.random() < 0.4 else None
-            rows.append({"ip": ip, "port": port, "ts": ts, "user_id": uid})
+            rows.append({"ip": ip, "ip_num": ip_to_int(ip), "port": port, "ts": ts, "user_id": uid})
 
         # Record an alert if a heavy ip spiked
         if ip_spiker:
             alerts_rows.append(
-                {"ip": ip_spiker, "message": "Excessive connection attempts detected", "ts": day}
+                {"ip": ip_spiker, "ip_num": ip_to_int(ip_spiker), "message": "Excessive connection attempts detected", "ts": day}
         )
 
     # Insert in batches
@@ -15,3 +15,15 @@ SELECT a.ip, a.message, u.username
 FROM alerts a
 JOIN connections c ON a.ip = c.ip
 LEFT JOIN users u ON c.user_id = u.id;
+
+-- Hits per /24 subnet (ip_num holds the IPv4 address as an integer)
+SELECT ip_num >> 8 AS subnet, COUNT(*) AS attempts
+FROM connections
+WHERE ip_num IS NOT NULL
+GROUP BY subnet
+ORDER BY attempts DESC;
+
+-- All hits from 203.0.113.0/24 (indexed range scan on ip_num)
+SELECT ip, port, ts
+FROM connections
+WHERE ip_num BETWEEN 3405803776 AND 3405804031;
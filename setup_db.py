@@ -1,4 +1,5 @@
-from db_utils import init_db
+from db_utils import backfill_ip_num, init_db
 
 if __name__ == "__main__":
     init_db(verbose=True)
+    backfill_ip_num(verbose=True)
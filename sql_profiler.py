@@ -0,0 +1,145 @@
+# sql_profiler.py
+"""Opt-in per-request SQL profiler for the dashboard blueprint.
+
+Enable with ``SQL_PROFILE=1``. While a request is being served by the
+``dashboard`` blueprint every statement executed on the engine is timed;
+the response gets a ``Server-Timing`` header (query count, total SQL time
+and the slowest statements) and statements slower than ``SQL_SLOW_MS``
+are written to a rotating **slow_queries.log** together with their
+parameters, so N+1 patterns and heavy scans are visible at once.
+"""
+
+import os
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# ── Settings ─────────────────────────────────────────────────────────────
+BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG     = os.path.join(BASE_DIR, "slow_queries.log")
+DEFAULT_SLOW_MS = 100.0      # milliseconds
+TOP_N           = 3          # slowest statements reported per request
+
+# ── Slow-query logger (rotating, same policy as honeypot.log) ────────────
+slow_logger = logging.getLogger("sql_profiler")
+slow_logger.setLevel(logging.INFO)
+slow_logger.propagate = False
+
+
+def _ensure_slow_handler(path: str) -> None:
+    path = os.path.abspath(path)
+    for handler in list(slow_logger.handlers):
+        if getattr(handler, "baseFilename", None) == path:
+            return
+        slow_logger.removeHandler(handler)
+        handler.close()
+    handler = RotatingFileHandler(path, maxBytes=1_000_000, backupCount=5)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    slow_logger.addHandler(handler)
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("SQL_PROFILE", "").lower() in ("1", "true", "yes", "on")
+
+
+def _slow_threshold(app: Flask) -> float:
+    """Read ``SQL_SLOW_MS``, falling back to the default on a bad value."""
+    raw = os.getenv("SQL_SLOW_MS")
+    if raw is None:
+        return DEFAULT_SLOW_MS
+    try:
+        value = float(raw)
+    except ValueError:
+        value = -1.0
+    if value < 0:
+        app.logger.warning(f"Ignoring invalid SQL_SLOW_MS={raw!r}, using {DEFAULT_SLOW_MS:g} ms")
+        return DEFAULT_SLOW_MS
+    return value
+
+
+# ── Engine hooks ─────────────────────────────────────────────────────────
+
+# The start time lives on the per-statement execution context, so a
+# statement that raises leaves nothing behind on the pooled connection.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and "sql_profile" in g:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start_time", None)
+    if started is None or not has_request_context() or "sql_profile" not in g:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    g.sql_profile.append((elapsed_ms, statement, parameters))
+
+
+def _attach_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ── Request hooks ────────────────────────────────────────────────────────
+
+def _start_request() -> None:
+    if request.blueprint == current_app.config.get("SQL_PROFILE_BLUEPRINT"):
+        g.sql_profile = []
+
+
+def _header_desc(statement: str) -> str:
+    """Shorten *statement* into an ASCII-only quoted-string for a header."""
+    desc = " ".join(statement.split())[:60]
+    desc = desc.encode("ascii", "replace").decode()
+    return desc.replace("\\", "\\\\").replace('"', "'")
+
+
+def _finish_request(response):
+    queries = g.pop("sql_profile", None)
+    if queries is None:
+        return response
+
+    total_ms = sum(q[0] for q in queries)
+    slowest = sorted(queries, key=lambda q: q[0], reverse=True)[:TOP_N]
+
+    timings = [f'sql;dur={total_ms:.2f};desc="{len(queries)} queries"']
+    for i, (elapsed_ms, statement, _) in enumerate(slowest, 1):
+        timings.append(f'sql-{i};dur={elapsed_ms:.2f};desc="{_header_desc(statement)}"')
+    response.headers.add("Server-Timing", ", ".join(timings))
+
+    threshold = current_app.config["SQL_SLOW_MS"]
+    for elapsed_ms, statement, parameters in queries:
+        if elapsed_ms >= threshold:
+            slow_logger.warning(
+                f"{elapsed_ms:.1f} ms {request.method} {request.path}: "
+                f"{' '.join(statement.split())} params={parameters!r}"
+            )
+    return response
+
+
+# ── Public entry point ───────────────────────────────────────────────────
+
+def init_profiler(app: Flask, engine: Engine, blueprint: str = "dashboard") -> bool:
+    """Profile requests served by *blueprint* if ``SQL_PROFILE`` is set.
+
+    Returns whether the profiler was installed.
+    """
+    if not profiling_enabled():
+        return False
+    threshold = _slow_threshold(app)
+    _ensure_slow_handler(os.getenv("SQL_SLOW_LOG", DEFAULT_LOG))
+    _attach_engine(engine)
+    app.config["SQL_PROFILE_BLUEPRINT"] = blueprint
+    app.config["SQL_SLOW_MS"] = threshold
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.logger.info(f"SQL profiling enabled (slow threshold {threshold:g} ms)")
+    return True
+
+
+__all__ = ["init_profiler", "profiling_enabled", "slow_logger"]
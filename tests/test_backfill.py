@@ -0,0 +1,134 @@
+import datetime
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import inspect, text
+
+
+def test_parse_line():
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    backfill_logs = importlib.import_module("backfill_logs")
+
+    assert backfill_logs.parse_line(
+        "2025-05-16 03:13:26,366 - INFO - Connection from 127.0.0.1:55092\n"
+    ) == ("127.0.0.1", 55092, datetime.datetime(2025, 5, 16, 3, 13, 26, 366000))
+    assert backfill_logs.parse_line(
+        "2025-05-16 03:12:55,857 - INFO - Honeypot listening on 0.0.0.0:2222"
+    ) is None
+    assert backfill_logs.parse_line("garbage") is None
+
+
+def test_backfill_is_deduplicated_and_resumable(monkeypatch, tmp_path):
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    monkeypatch.setenv("DATABASE_URL", db_url)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)
+    backfill_logs = importlib.import_module("backfill_logs")
+
+    # One connection is already in the database (with sub-second precision)
+    db_utils.insert_connection(
+        "203.0.113.5", 40000, datetime.datetime(2024, 3, 1, 12, 0, 0, 250000)
+    )
+    log = tmp_path / "honeypot.log"
+    log.write_text(
+        "".join(
+            f"2024-03-01 12:00:{i:02d},250 - INFO - Connection from 203.0.113.5:{40000 + i}\n"
+            for i in range(50)
+        )
+    )
+    state = str(tmp_path / "state.json")
+
+    stats = backfill_logs.backfill([str(log)], workers=2, chunk_mb=0.0005, state_path=state)
+    assert stats["chunks"] > 1
+    assert stats["inserted"] == 49
+    assert stats["duplicates"] == 1
+    indexes = {i["name"] for i in inspect(db_utils.engine).get_indexes("connections")}
+    assert backfill_logs.TS_INDEX not in indexes
+
+    # A second run has nothing left to do
+    again = backfill_logs.backfill([str(log)], workers=2, chunk_mb=0.0005, state_path=state)
+    assert again["chunks"] == 0
+
+    # The live log grows, ending in a line that is still being written:
+    # only the new complete line is read, the partial one waits
+    with open(log, "a") as f:
+        f.write("2024-03-01 12:01:00,000 - INFO - Connection from 203.0.113.6:41000\n")
+        f.write("2024-03-01 12:01:01,000 - INFO - Connection from 203.0.113.6:41")
+    grown = backfill_logs.backfill([str(log)], workers=2, chunk_mb=0.0005, state_path=state)
+    assert grown["chunks"] == 1
+    assert grown["inserted"] == 1
+    assert grown["duplicates"] == 0
+
+    with open(log, "a") as f:
+        f.write("001\n")
+    finished = backfill_logs.backfill([str(log)], workers=2, chunk_mb=0.0005, state_path=state)
+    assert finished["inserted"] == 1
+    assert finished["duplicates"] == 0
+
+    with db_utils.engine.connect() as conn:
+        count = conn.execute(
+            text("SELECT COUNT(*) FROM connections WHERE ip = '203.0.113.5'")
+        ).scalar()
+    assert count == 50
+
+
+def test_backfill_matches_across_second_boundary(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/test.db")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)
+    backfill_logs = importlib.import_module("backfill_logs")
+
+    # The honeypot read its clock just before the second ticked over;
+    # the log line was stamped just after
+    db_utils.insert_connection(
+        "198.18.0.1", 50000, datetime.datetime(2024, 4, 1, 8, 59, 59, 998000)
+    )
+    log = tmp_path / "honeypot.log"
+    log.write_text(
+        "2024-04-01 09:00:00,003 - INFO - Connection from 198.18.0.1:50000\n"
+        "2024-04-01 09:00:05,120 - INFO - Connection from 198.18.0.1:50000\n"
+    )
+
+    stats = backfill_logs.backfill(
+        [str(log)], workers=1, state_path=str(tmp_path / "state.json")
+    )
+    assert stats["duplicates"] == 1
+    assert stats["inserted"] == 1
+
+    with db_utils.engine.connect() as conn:
+        stamps = conn.execute(
+            text("SELECT ts FROM connections WHERE ip = '198.18.0.1' ORDER BY ts")
+        ).scalars().all()
+    assert [str(ts) for ts in stamps] == [
+        "2024-04-01 08:59:59.998000",
+        "2024-04-01 09:00:05.120000",
+    ]
+
+
+def test_default_logs_only_numeric_rotations(monkeypatch, tmp_path):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    backfill_logs = importlib.import_module("backfill_logs")
+
+    live = tmp_path / "honeypot.log"
+    for name in ("honeypot.log", "honeypot.log.1", "honeypot.log.2", "honeypot.log.10",
+                 "honeypot.log.2.gz", "honeypot.log.1.bak"):
+        (tmp_path / name).write_text("")
+    monkeypatch.setattr(backfill_logs, "LOG_FILE_PATH", str(live))
+
+    assert [Path(p).name for p in backfill_logs.default_logs()] == [
+        "honeypot.log.10", "honeypot.log.2", "honeypot.log.1", "honeypot.log",
+    ]
+
+
+def test_main_rejects_missing_log(tmp_path):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    backfill_logs = importlib.import_module("backfill_logs")
+
+    missing = tmp_path / "honeypot.log.9"
+    with pytest.raises(SystemExit) as exc:
+        backfill_logs.main([str(missing)])
+    assert str(missing) in str(exc.value)
@@ -0,0 +1,92 @@
+import datetime
+import importlib
+import sys
+from pathlib import Path
+
+
+def _client(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/test.db")
+    monkeypatch.delenv("SQL_PROFILE", raising=False)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)
+    dashboard = importlib.reload(importlib.import_module("dashboard"))
+
+    ts = datetime.datetime(2024, 6, 1, 12, 0, 0)
+    for host in (5, 5, 9):
+        db_utils.insert_connection(f"100.64.1.{host}", 22, ts)
+    db_utils.insert_connection("100.64.2.1", 22, ts)
+
+    client = dashboard.create_app().test_client()
+    client.get("/login")
+    return client
+
+
+def test_api_stats_cidr_and_prefix(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+
+    resp = client.get("/api/stats?cidr=100.64.1.0/24")
+    assert resp.status_code == 200
+    assert sorted((r["ip"], r["hits"]) for r in resp.json) == [
+        ("100.64.1.5", 2),
+        ("100.64.1.9", 1),
+    ]
+
+    resp = client.get("/api/stats?prefix=24&cidr=100.64.0.0/16")
+    assert resp.status_code == 200
+    assert sorted((r["subnet"], r["hits"]) for r in resp.json) == [
+        ("100.64.1.0/24", 3),
+        ("100.64.2.0/24", 1),
+    ]
+
+
+def test_api_stats_rejects_invalid_prefix_and_cidr(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+
+    for query in ("prefix=40", "prefix=abc", "prefix=-1", "cidr=bogus", "cidr=100.64.1.0/33"):
+        resp = client.get(f"/api/stats?{query}")
+        assert resp.status_code == 400, query
+        assert "error" in resp.json
+
+
+def test_dashboard_cidr_filter(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+
+    page = client.get("/?cidr=100.64.1.0/24").get_data(as_text=True)
+    assert "100.64.1.5" in page
+    assert "100.64.2.1" not in page
+    assert "10.0.0." not in page
+
+    page = client.get("/?cidr=bogus").get_data(as_text=True)
+    assert "Invalid CIDR range: bogus" in page
+
+
+def test_dashboard_cidr_query_plans_on_ip_num(monkeypatch, tmp_path):
+    client = _client(monkeypatch, tmp_path)
+    db_utils = sys.modules["db_utils"]
+    from sqlalchemy import event, text
+
+    # An index on ts (e.g. left by a running log backfill) must not win
+    with db_utils.engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_connections_ts ON connections (ts)"))
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "LEFT JOIN alerts" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(db_utils.engine, "before_cursor_execute", capture)
+    try:
+        assert client.get("/?cidr=100.64.1.0/24").status_code == 200
+    finally:
+        event.remove(db_utils.engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[0]
+    with db_utils.engine.connect() as conn:
+        plan = " ".join(
+            row[-1]
+            for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        )
+    assert "ix_connections_ip_num" in plan
+    assert "ix_connections_ts" not in plan
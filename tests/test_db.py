@@ -1,5 +1,6 @@
 import datetime
 import importlib
+import sqlite3
 import sys
 from pathlib import Path
 from sqlalchemy import text
@@ -36,3 +37,76 @@ def test_init_db_idempotent(monkeypatch, tmp_path):
         ).scalar()
 
     assert count == 1
+
+
+def test_cidr_range_and_ip_to_int(monkeypatch, tmp_path):
+    db_url = f"sqlite:///{tmp_path}/test.db"
+    monkeypatch.setenv("DATABASE_URL", db_url)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)
+
+    assert db_utils.ip_to_int("203.0.113.10") == 3405803786
+    assert db_utils.ip_to_int("not-an-ip") is None
+    assert db_utils.ip_to_int("::1") is None
+    assert db_utils.cidr_range("203.0.113.0/24") == (3405803776, 3405804031)
+    assert db_utils.cidr_range("10.0.0.7") == (167772167, 167772167)
+
+
+def test_migrate_and_backfill_legacy_schema(monkeypatch, tmp_path):
+    # Build a pre-ip_num database: one distinct address per row so a
+    # per-address UPDATE without an index would be quadratic
+    db_path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE connections (
+            id INTEGER PRIMARY KEY, ip VARCHAR NOT NULL, port INTEGER NOT NULL,
+            ts DATETIME NOT NULL, user_id INTEGER
+        );
+        CREATE TABLE alerts (
+            id INTEGER PRIMARY KEY, ip VARCHAR NOT NULL, message VARCHAR NOT NULL,
+            ts DATETIME NOT NULL
+        );
+        """
+    )
+    rows = [(f"100.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 22) for i in range(30000)]
+    legacy.executemany(
+        "INSERT INTO connections (ip, port, ts) VALUES (?, ?, '2024-01-01 00:00:00')", rows
+    )
+    legacy.execute(
+        "INSERT INTO connections (ip, port, ts) VALUES ('::1', 22, '2024-01-01 00:00:00')"
+    )
+    legacy.execute(
+        "INSERT INTO alerts (ip, message, ts) VALUES ('100.0.0.7', 'x', '2024-01-01 00:00:00')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)  # init_db adds the column but does not backfill
+
+    with db_utils.engine.connect() as conn:
+        pending = conn.execute(
+            text("SELECT COUNT(*) FROM connections WHERE ip_num IS NULL")
+        ).scalar()
+    assert pending == 30001
+
+    db_utils.backfill_ip_num(batch_size=4000)
+
+    lo, hi = db_utils.cidr_range("100.0.0.0/16")
+    with db_utils.engine.connect() as conn:
+        in_range = conn.execute(
+            text("SELECT COUNT(*) FROM connections WHERE ip_num BETWEEN :lo AND :hi"),
+            {"lo": lo, "hi": hi},
+        ).scalar()
+        still_null = conn.execute(
+            text("SELECT ip FROM connections WHERE ip_num IS NULL")
+        ).scalars().all()
+        alert_num = conn.execute(text("SELECT ip_num FROM alerts WHERE ip = '100.0.0.7'")).scalar()
+
+    assert in_range == 30000
+    assert still_null == ["::1"]
+    assert alert_num == db_utils.ip_to_int("100.0.0.7")
@@ -0,0 +1,77 @@
+import importlib
+import sys
+from pathlib import Path
+
+
+def _load_dashboard(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path}/test.db")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    db_utils = importlib.import_module("db_utils")
+    importlib.reload(db_utils)
+    dashboard = importlib.import_module("dashboard")
+    return importlib.reload(dashboard)
+
+
+def test_profiler_reports_server_timing_and_slow_log(monkeypatch, tmp_path):
+    slow_log = tmp_path / "slow.log"
+    monkeypatch.setenv("SQL_PROFILE", "1")
+    monkeypatch.setenv("SQL_SLOW_MS", "0")
+    monkeypatch.setenv("SQL_SLOW_LOG", str(slow_log))
+    dashboard = _load_dashboard(monkeypatch, tmp_path)
+
+    client = dashboard.create_app().test_client()
+    client.get("/login")
+    resp = client.get("/?ip=203.0.113.10")
+
+    assert resp.status_code == 200
+    timing = resp.headers["Server-Timing"]
+    assert 'desc="2 queries"' in timing
+    assert "sql-1;dur=" in timing
+    assert "SELECT c.ip, c.port, c.ts, a.message FROM connections c" in timing
+
+    logged = slow_log.read_text()
+    assert "GET /: SELECT c.ip, c.port, c.ts, a.message" in logged
+    assert "'203.0.113.10'" in logged
+
+
+def test_profiler_ignores_invalid_threshold(monkeypatch, tmp_path):
+    monkeypatch.setenv("SQL_PROFILE", "1")
+    monkeypatch.setenv("SQL_SLOW_MS", "fast")
+    monkeypatch.setenv("SQL_SLOW_LOG", str(tmp_path / "slow.log"))
+    dashboard = _load_dashboard(monkeypatch, tmp_path)
+
+    app = dashboard.create_app()
+    assert app.config["SQL_SLOW_MS"] == 100.0
+
+
+def test_profiler_off_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv("SQL_PROFILE", raising=False)
+    monkeypatch.setenv("SQL_SLOW_MS", "fast")
+    dashboard = _load_dashboard(monkeypatch, tmp_path)
+
+    client = dashboard.create_app().test_client()
+    client.get("/login")
+    resp = client.get("/")
+
+    assert resp.status_code == 200
+    assert "Server-Timing" not in resp.headers
+
+
+def test_profiler_header_is_ascii_safe(monkeypatch, tmp_path):
+    monkeypatch.setenv("SQL_PROFILE", "1")
+    monkeypatch.setenv("SQL_SLOW_MS", "0")
+    monkeypatch.setenv("SQL_SLOW_LOG", str(tmp_path / "slow.log"))
+    dashboard = _load_dashboard(monkeypatch, tmp_path)
+
+    client = dashboard.create_app().test_client()
+    client.get("/login")
+    resp = client.post(
+        "/dbgui",
+        data={"query": r"SELECT * FROM alerts WHERE message LIKE '%日本\%' ESCAPE '\'"},
+    )
+
+    assert resp.status_code == 200
+    timing = resp.headers["Server-Timing"]
+    timing.encode("latin-1")  # must be sendable by the WSGI server
+    assert timing.isascii()
+    assert r"LIKE '%??\\%' ESCAPE '\\'" in timing